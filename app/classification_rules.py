@@ -0,0 +1,111 @@
+# app/classification_rules.py
+
+import re
+
+# Local fast-path rules for classify_text_gpt; only unambiguous matches skip GPT
+_IBAN_RE = re.compile(r"\b[A-Z]{2}\d{2}(?: ?[A-Z0-9]{4}){2,7}(?: ?[A-Z0-9]{1,4})?\b")
+# IBAN length per country (SWIFT IBAN registry)
+_IBAN_LENGTHS = {
+    "AD": 24, "AE": 23, "AL": 28, "AT": 20, "AZ": 28, "BA": 20, "BE": 16, "BG": 22,
+    "BH": 22, "BR": 29, "BY": 28, "CH": 21, "CR": 22, "CY": 28, "CZ": 24, "DE": 22,
+    "DK": 18, "DO": 28, "EE": 20, "EG": 29, "ES": 24, "FI": 18, "FO": 18, "FR": 27,
+    "GB": 22, "GE": 22, "GI": 23, "GL": 18, "GR": 27, "GT": 28, "HR": 21, "HU": 28,
+    "IE": 22, "IL": 23, "IQ": 23, "IS": 26, "IT": 27, "JO": 30, "KW": 30, "KZ": 20,
+    "LB": 28, "LC": 32, "LI": 21, "LT": 20, "LU": 20, "LV": 21, "MC": 27, "MD": 24,
+    "ME": 22, "MK": 19, "MR": 27, "MT": 31, "MU": 30, "NL": 18, "NO": 15, "PK": 24,
+    "PL": 28, "PS": 29, "PT": 25, "QA": 29, "RO": 24, "RS": 22, "SA": 24, "SC": 31,
+    "SE": 24, "SI": 19, "SK": 24, "SM": 27, "ST": 25, "SV": 28, "TL": 23, "TN": 24,
+    "TR": 26, "UA": 29, "VA": 22, "VG": 24, "XK": 20,
+}
+
+# Card numbers only in card-style grouping: 4-4-4-4, or 4-6-5 for Amex
+_CARD_RE = re.compile(
+    r"(?<![\d-])"
+    r"(?:\d{4}([ -])\d{4}\1\d{4}\1\d{4}"
+    r"|3[47]\d{2}([ -])\d{6}\2\d{5})"
+    r"(?![\d-])"
+)
+# Visa, Mastercard (51-55, 2221-2720), Amex, Discover
+_CARD_ISSUER_RE = re.compile(r"4|5[1-5]|222[1-9]|22[3-9]\d|2[3-6]\d\d|27[01]\d|2720|3[47]|6011|65")
+
+_EMAIL_RE = re.compile(r"\b[\w.+-]+@[\w-]+\.[\w.-]+\b")
+
+# Real phone shapes only, so dates ("2024-01-15") and ranges ("1200-1500") don't count
+_PHONE_RE = re.compile(
+    r"(?<![\w+-])"
+    r"(?:\+\d[\d ()-]{8,18}\d"              # international, leading "+"
+    r"|\(?\d{3}\)?[ .-]\d{3}[ .-]\d{4}"      # 3-3-4 grouping
+    r"|\d{5}[ -]\d{5})"                     # 5-5 grouping
+    r"(?![\w-])"
+)
+
+_MEDICAL_RE = re.compile(
+    r"\b(?:patients?|diagnos\w*|symptoms?|prescri\w*|clinics?|clinical|hospitals?|physicians?"
+    r"|medications?|dosage)\b",
+    re.IGNORECASE,
+)
+_MIN_MEDICAL_TERMS = 3
+_MAX_CONTACT_ONLY_WORDS = 5
+_RULE_CONFIDENCE = 0.9
+
+
+def _luhn_ok(number: str) -> bool:
+    digits = [int(d) for d in number if d.isdigit()]
+    checksum = 0
+    for i, d in enumerate(reversed(digits)):
+        if i % 2:
+            d *= 2
+            if d > 9:
+                d -= 9
+        checksum += d
+    return checksum % 10 == 0
+
+
+def _is_card_number(match: re.Match) -> bool:
+    digits = "".join(c for c in match.group() if c.isdigit())
+    return bool(_CARD_ISSUER_RE.match(digits)) and _luhn_ok(digits)
+
+
+def _is_iban(match: re.Match) -> bool:
+    iban = match.group().replace(" ", "")
+    if len(iban) != _IBAN_LENGTHS.get(iban[:2]):
+        return False
+    # ISO 13616 check: move the first four characters to the end, letters become 10-35
+    rearranged = "".join(str(int(c, 36)) for c in iban[4:] + iban[:4])
+    return int(rearranged) % 97 == 1
+
+
+def _strip_phone(match: re.Match) -> str:
+    number = match.group()
+    digit_count = sum(c.isdigit() for c in number)
+    return " " if 10 <= digit_count <= 15 else number
+
+
+def rule_classify(text: str) -> dict | None:
+    """
+    Classify text locally when a rule matches clearly; None means "ask GPT".
+    """
+    matches = set()
+
+    if any(_is_iban(m) for m in _IBAN_RE.finditer(text)) or any(_is_card_number(m) for m in _CARD_RE.finditer(text)):
+        matches.add("Finance / Banking")
+
+    if len({m.group().lower() for m in _MEDICAL_RE.finditer(text)}) >= _MIN_MEDICAL_TERMS:
+        matches.add("Healthcare / Medical")
+
+    if not matches:
+        # Text that is little more than contact details
+        remainder, emails = _EMAIL_RE.subn(" ", text)
+        stripped = _PHONE_RE.sub(_strip_phone, remainder)
+        has_contact = emails > 0 or stripped != remainder
+        if has_contact and len(stripped.split()) <= _MAX_CONTACT_ONLY_WORDS:
+            matches.add("Personal Information")
+
+    if len(matches) != 1:
+        return None
+
+    return {
+        "label": matches.pop(),
+        "confidence": _RULE_CONFIDENCE,
+        "explanation": "Matched a local rule for this category."
+    }
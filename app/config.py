@@ -1,16 +1,16 @@
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 from dotenv import load_dotenv
 
-# Load .env values
-load_dotenv()
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Settings:
     # Azure Language Service
     azure_language_endpoint: str
     azure_language_key: str
     azure_language_region: str
+    azure_language_fused_actions: bool
 
     # Azure OpenAI
     azure_openai_endpoint: str
@@ -27,14 +27,21 @@ class Settings:
     cosmos_key: str
     cosmos_db_name: str
     cosmos_container_name: str
+    cosmos_ensure_schema: bool
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
+    # Load .env values only for local runs; containers already have a populated env
+    if os.getenv("SKIP_DOTENV") != "1" and os.getenv("AZURE_LANGUAGE_ENDPOINT") is None:
+        load_dotenv(override=False)
+
     return Settings(
         # Language Service
         azure_language_endpoint=os.getenv("AZURE_LANGUAGE_ENDPOINT"),
         azure_language_key=os.getenv("AZURE_LANGUAGE_KEY"),
         azure_language_region=os.getenv("AZURE_LANGUAGE_REGION"),
+        azure_language_fused_actions=os.getenv("AZURE_LANGUAGE_FUSED_ACTIONS") == "1",
 
         # OpenAI
         azure_openai_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
@@ -50,5 +57,6 @@ def get_settings() -> Settings:
         cosmos_endpoint=os.getenv("COSMOS_ENDPOINT"),
         cosmos_key=os.getenv("COSMOS_KEY"),
         cosmos_db_name=os.getenv("COSMOS_DB"),
-        cosmos_container_name=os.getenv("COSMOS_CONTAINER")
+        cosmos_container_name=os.getenv("COSMOS_CONTAINER"),
+        cosmos_ensure_schema=os.getenv("COSMOS_ENSURE_SCHEMA") == "1"
     )
@@ -2,32 +2,71 @@
 
 from azure.cosmos import CosmosClient, PartitionKey, exceptions
 from app.config import get_settings
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import lru_cache
 import uuid
 
+try:
+    import streamlit as st
+except ImportError:
+    st = None
 
-settings = get_settings()
 
-if not settings.cosmos_endpoint or not settings.cosmos_key:
-    raise RuntimeError("CosmosDB endpoint or key is not configured in environment variables.")
+def _build_container():
+    settings = get_settings()
 
-if not settings.cosmos_db_name or not settings.cosmos_container_name:
-    raise RuntimeError("COSMOS_DB_NAME or COSMOS_CONTAINER_NAME is not configured in environment variables.")
+    if not settings.cosmos_endpoint or not settings.cosmos_key:
+        raise RuntimeError("CosmosDB endpoint or key is not configured in environment variables.")
 
+    if not settings.cosmos_db_name or not settings.cosmos_container_name:
+        raise RuntimeError("COSMOS_DB_NAME or COSMOS_CONTAINER_NAME is not configured in environment variables.")
 
-_cosmos_client = CosmosClient(settings.cosmos_endpoint, credential=settings.cosmos_key)
+    cosmos_client = CosmosClient(settings.cosmos_endpoint, credential=settings.cosmos_key)
 
-# Create DB and container if they don't exist
-_db = _cosmos_client.create_database_if_not_exists(id=settings.cosmos_db_name)
+    if not settings.cosmos_ensure_schema:
+        # DB and container are provisioned ahead of time; no round trips needed
+        db = cosmos_client.get_database_client(settings.cosmos_db_name)
+        return db.get_container_client(settings.cosmos_container_name)
 
-_container = _db.create_container_if_not_exists(
-    id=settings.cosmos_container_name,
-    partition_key=PartitionKey(path="/classification_label"),
-    offer_throughput=400
-)
+    # Create DB and container if they don't exist
+    db = cosmos_client.create_database_if_not_exists(id=settings.cosmos_db_name)
 
+    return db.create_container_if_not_exists(
+        id=settings.cosmos_container_name,
+        partition_key=PartitionKey(path="/classification_label"),
+        offer_throughput=400
+    )
+
+
+# One container per process: owned by the Streamlit runtime when available, else lru_cache
+if st is not None:
+    get_container = st.cache_resource(show_spinner=False)(_build_container)
+else:
+    get_container = lru_cache(maxsize=1)(_build_container)
+
+
+class _ByIdentity:
+    """
+    Hashable wrapper that compares by object identity, so an unhashable
+    result dict can be part of an lru_cache key. The cache holds the
+    wrapper (and thus the dict), so the id can't be reused while cached.
+    """
+    __slots__ = ("obj",)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __hash__(self):
+        return id(self.obj)
+
+    def __eq__(self, other):
+        return isinstance(other, _ByIdentity) and other.obj is self.obj
+
+
+@lru_cache(maxsize=16)
+def _assemble_static_fields(result_ref: _ByIdentity, raw_text: str, source_type: str, file_name: str | None):
+    result = result_ref.obj
 
-def build_cosmos_document(result: dict, raw_text: str, source_type: str, file_name: str | None):
     language = result.get("language", {})
     sentiment = result.get("sentiment", {})
     classification = result.get("classification", {})
@@ -37,11 +76,9 @@ def build_cosmos_document(result: dict, raw_text: str, source_type: str, file_na
     entities = result.get("entities", [])
 
     pii_categories = sorted({item["category"] for item in pii}) if pii else []
+    summary_str = " ".join(summary_list) if isinstance(summary_list, list) else summary_list
 
-    doc = {
-        "id": str(uuid.uuid4()),
-        "timestamp": datetime.utcnow().isoformat() + "Z",
-
+    return {
         "source_type": source_type,          # "file" or "text"
         "file_name": file_name,
 
@@ -55,7 +92,7 @@ def build_cosmos_document(result: dict, raw_text: str, source_type: str, file_na
         "has_pii": bool(pii),
         "pii_categories": pii_categories,
 
-        "summary": " ".join(summary_list) if isinstance(summary_list, list) else summary_list,
+        "summary": summary_str,
 
         "key_phrases": key_phrases,
         "entities": entities,
@@ -63,18 +100,34 @@ def build_cosmos_document(result: dict, raw_text: str, source_type: str, file_na
         "raw_text": raw_text,
     }
 
-    return doc
+
+def _finalize(static_fields: dict) -> dict:
+    # Fresh id + timestamp on every send; copying keeps the cached fields untouched
+    return {
+        "id": uuid.uuid4().hex,
+        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        **static_fields,
+    }
+
+
+def build_cosmos_document(result: dict, raw_text: str, source_type: str, file_name: str | None):
+    static_fields = _assemble_static_fields(_ByIdentity(result), raw_text, source_type, file_name)
+    return _finalize(static_fields)
 
 
-def save_analysis_to_cosmos(result: dict, raw_text: str, source_type: str, file_name: str | None = None) -> str:
+def save_analysis_to_cosmos(result: dict, raw_text: str, source_type: str, file_name: str | None = None,
+                            container=None) -> str:
     doc = build_cosmos_document(result, raw_text, source_type, file_name)
 
     # Make sure partition key exists
     if not doc.get("classification_label"):
         doc["classification_label"] = "Unclassified"
 
+    if container is None:
+        container = get_container()
+
     try:
-        _container.create_item(doc)
+        container.create_item(doc)
         return doc["id"]
     except exceptions.CosmosHttpResponseError as e:
         raise RuntimeError(f"Failed to save to CosmosDB: {e}") from e
@@ -8,16 +8,51 @@ if PARENT_DIR not in sys.path:
     sys.path.insert(0, PARENT_DIR)
     
 
-import json
-import tempfile
+import types
 from pathlib import Path
 
+import orjson
 import pandas as pd
 import streamlit as st
 
 from app.file_loader import load_text_from_file
-from app.nlp_service import analyze_text_all, translate_text
-from app.cosmos_client import save_analysis_to_cosmos
+from app.nlp_service import (
+    TRANSLATION_ERROR_PREFIX,
+    _executor,
+    analyze_text_all,
+    stream_summary_gpt,
+    translate_text,
+)
+from app.cosmos_client import get_container, save_analysis_to_cosmos
+
+
+# ---------------- Constants ----------------
+_DEFAULT_TEXT = (
+    "Hello, my name is Rahul Sharma. I currently live in Hyderabad and work as a data analyst "
+    "at a healthcare startup. My contact number is 98765-12345 and my email is rahul.sharma@example.com. "
+    "I am planning to travel to Bengaluru next week for a client meeting. Overall, I feel excited "
+    "but a bit nervous about the presentation I need to deliver. "
+    "The company is particularly interested in patient data trends, risk predictions, and improving "
+    "medical decision support systems using AI solutions."
+)
+
+_LANGUAGE_MAP = types.MappingProxyType({
+    "English": "en",
+    "Spanish": "es",
+    "French": "fr",
+    "Hindi": "hi",
+    "Arabic": "ar",
+    "Japanese": "ja",
+    "Tamil": "ta",
+    "Telugu": "te",
+    "German": "de",
+    "Chinese": "zh",
+})
+
+_LANGUAGE_NAMES = tuple(_LANGUAGE_MAP)
+
+# Below this many rows, render with st.table and skip DataFrame/Arrow conversion
+_SMALL_TABLE_ROWS = 25
 
 
 # ---------------- Page Setup ----------------
@@ -30,6 +65,41 @@ st.title("🔍 Azure NLP Text Analytics Dashboard")
 st.caption("Powered by Azure AI Language, Azure OpenAI, and Cosmos DB")
 
 
+# ---------------- Cached Service Calls ----------------
+@st.cache_data(ttl=3600, max_entries=128, show_spinner=False)
+def _cached_analyze(text: str) -> dict:
+    # The summary is streamed in the Overview tab instead
+    return analyze_text_all(text, include_summary=False)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _serialize_result(result: dict) -> bytes:
+    return orjson.dumps(result, option=orjson.OPT_INDENT_2)
+
+
+# ---------------- Cached Chart Data ----------------
+@st.cache_data(max_entries=32, show_spinner=False)
+def _sentiment_df(scores: dict) -> pd.DataFrame:
+    return pd.DataFrame({
+        "sentiment": ["positive", "neutral", "negative"],
+        "score": [
+            scores["positive"],
+            scores["neutral"],
+            scores["negative"],
+        ],
+    }).set_index("sentiment")
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _multi_language_df(multi_language: list) -> pd.DataFrame:
+    return pd.DataFrame(multi_language).set_index("language")[["confidence"]]
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _records_df(records: list) -> pd.DataFrame:
+    return pd.DataFrame(records)
+
+
 # ---------------- Session State ----------------
 if "uploaded_text" not in st.session_state:
     st.session_state["uploaded_text"] = None
@@ -43,6 +113,9 @@ if "source_type" not in st.session_state:
 if "file_name" not in st.session_state:
     st.session_state["file_name"] = None
 
+if "text_preview" not in st.session_state:
+    st.session_state["text_preview"] = None
+
 
 # ---------------- Sidebar ----------------
 st.sidebar.header("📥 Input Options")
@@ -54,18 +127,11 @@ input_mode = st.sidebar.radio(
 )
 
 if input_mode == "Paste text":
-    default_text = (
-        "Hello, my name is Rahul Sharma. I currently live in Hyderabad and work as a data analyst "
-    "at a healthcare startup. My contact number is 98765-12345 and my email is rahul.sharma@example.com. "
-    "I am planning to travel to Bengaluru next week for a client meeting. Overall, I feel excited "
-    "but a bit nervous about the presentation I need to deliver. "
-    "The company is particularly interested in patient data trends, risk predictions, and improving "
-    "medical decision support systems using AI solutions."
-    )
-    text = st.sidebar.text_area("Enter text:", value=default_text, height=150)
+    text = st.sidebar.text_area("Enter text:", value=_DEFAULT_TEXT, height=150)
 
     if st.sidebar.button("Analyze Text"):
         st.session_state["uploaded_text"] = text
+        st.session_state["text_preview"] = text[:5000]
         st.session_state["analysis_result"] = None
         st.session_state["source_type"] = "text"
         st.session_state["file_name"] = None
@@ -77,12 +143,10 @@ else:
     )
 
     if uploaded_file is not None and st.sidebar.button("Analyze File"):
-        suffix = Path(uploaded_file.name).suffix
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(uploaded_file.getbuffer())
-            tmp_path = tmp.name
-
-        st.session_state["uploaded_text"] = load_text_from_file(tmp_path)
+        st.session_state["uploaded_text"] = load_text_from_file(
+            uploaded_file.getvalue(), Path(uploaded_file.name).suffix
+        )
+        st.session_state["text_preview"] = st.session_state["uploaded_text"][:5000]
         st.session_state["analysis_result"] = None
         st.session_state["source_type"] = "file"
         st.session_state["file_name"] = uploaded_file.name
@@ -97,7 +161,7 @@ if not st.session_state["uploaded_text"]:
 # ---------------- Run NLP Analysis ----------------
 if st.session_state["analysis_result"] is None:
     with st.spinner("Running Azure NLP Analysis..."):
-        st.session_state["analysis_result"] = analyze_text_all(
+        st.session_state["analysis_result"] = _cached_analyze(
             st.session_state["uploaded_text"]
         )
 
@@ -119,6 +183,18 @@ tabs = st.tabs([
     "💾 Save / Export"
 ])
 
+# Start translating now so the HTTP call overlaps with rendering the other tabs.
+# translate_text is cached in nlp_service and never touches Streamlit, so it can run off-thread.
+with tabs[7]:
+    st.header("🌍 Translate Text")
+
+    selected_lang = st.selectbox(
+        "Select output language",
+        _LANGUAGE_NAMES
+    )
+
+translation_future = _executor.submit(translate_text, uploaded_text, _LANGUAGE_MAP[selected_lang])
+
 # ---------------- TAB: Overview ----------------
 with tabs[0]:
     st.header("🧭 Overview")
@@ -132,7 +208,8 @@ with tabs[0]:
             for i, sent in enumerate(summary, start=1):
                 st.write(f"{i}. {sent}")
         else:
-            st.write("No summary available.")
+            # Show tokens as they arrive; keep the text so reruns, export and save reuse it
+            result["summary"] = [st.write_stream(stream_summary_gpt(uploaded_text)).strip()]
 
     with col2:
         st.subheader("Detected Topics")
@@ -155,8 +232,7 @@ with tabs[1]:
     st.subheader("Multi-language Breakdown")
     ml = result.get("multi_language", [])
     if ml:
-        ml_df = pd.DataFrame(ml).set_index("language")[["confidence"]]
-        st.bar_chart(ml_df)
+        st.bar_chart(_multi_language_df(ml))
     else:
         st.info("No multilingual content detected.")
 
@@ -165,17 +241,7 @@ with tabs[1]:
 with tabs[2]:
     st.header("😊 Sentiment Analysis")
 
-    sent_scores = result["sentiment"]["scores"]
-    sentiment_df = pd.DataFrame({
-        "sentiment": ["positive", "neutral", "negative"],
-        "score": [
-            sent_scores["positive"],
-            sent_scores["neutral"],
-            sent_scores["negative"],
-        ],
-    }).set_index("sentiment")
-
-    st.bar_chart(sentiment_df)
+    st.bar_chart(_sentiment_df(result["sentiment"]["scores"]))
 
 
 # ---------------- TAB: Classification ----------------
@@ -209,8 +275,10 @@ with tabs[5]:
     st.header("🏷 Named Entities")
 
     entities = result.get("entities", [])
-    if entities:
-        st.dataframe(pd.DataFrame(entities), use_container_width=True)
+    if entities and len(entities) < _SMALL_TABLE_ROWS:
+        st.table(entities)
+    elif entities:
+        st.dataframe(_records_df(entities), use_container_width=True)
     else:
         st.write("No entities detected.")
 
@@ -220,42 +288,27 @@ with tabs[6]:
     st.header("🛡 PII Detection")
 
     pii = result.get("pii", [])
-    if pii:
-        st.dataframe(pd.DataFrame(pii), use_container_width=True)
+    if pii and len(pii) < _SMALL_TABLE_ROWS:
+        st.table(pii)
+    elif pii:
+        st.dataframe(_records_df(pii), use_container_width=True)
     else:
         st.write("No PII entities found.")
 
 
 # ---------------- TAB: Translation ----------------
 with tabs[7]:
-    st.header("🌍 Translate Text")
-
-    language_map = {
-        "English": "en",
-        "Spanish": "es",
-        "French": "fr",
-        "Hindi": "hi",
-        "Arabic": "ar",
-        "Japanese": "ja",
-        "Tamil": "ta",
-        "Telugu": "te",
-        "German": "de",
-        "Chinese": "zh",
-    }
-
-    selected_lang = st.selectbox(
-        "Select output language",
-        list(language_map.keys())
-    )
-
-    translated_output = translate_text(uploaded_text, language_map[selected_lang])
-    st.success(translated_output)
+    translated_output = translation_future.result()
+    if translated_output.startswith(TRANSLATION_ERROR_PREFIX):
+        st.error(translated_output)
+    else:
+        st.success(translated_output)
 
 
 # ---------------- TAB: Raw Data ----------------
 with tabs[8]:
     st.header("📄 Raw Text")
-    st.text(uploaded_text[:5000])
+    st.text(st.session_state["text_preview"])
 
     st.subheader("JSON Output")
     st.json(result)
@@ -271,20 +324,16 @@ with tabs[9]:
                 result=result,
                 raw_text=uploaded_text,
                 source_type=st.session_state["source_type"],
-                file_name=st.session_state["file_name"]
+                file_name=st.session_state["file_name"],
+                container=get_container()
             )
             st.success(f"Saved! Document ID: {doc_id}")
         except Exception as e:
             st.error(f"Failed to save: {e}")
 
-    result_json = json.dumps(result, indent=2, ensure_ascii=False)
-
-    if "json_cache" not in st.session_state:
-        st.session_state["json_cache"] = result_json.encode("utf-8")
-
     st.download_button(
         "⬇️ Download results as JSON",
-        st.session_state["json_cache"],
+        _serialize_result(result),
         file_name="nlp_analysis_result.json",
         mime="application/json",
         key="json_download"
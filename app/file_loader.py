@@ -1,14 +1,19 @@
 # app/file_loader.py
 
-import json
-import pandas as pd
+import csv
+import io
 from pathlib import Path
-from PyPDF2 import PdfReader
-from docx import Document
 
-def load_text_from_file(file_path: str) -> str:
+import orjson
+
+# PDF/DOCX parsers are imported inside their extractors so uploads of
+# other formats don't pay their import cost.
+
+def load_text_from_file(src: str | bytes, suffix: str | None = None) -> str:
     """
     Convert supported file types to plain text.
+    `src` is either a file path or the raw file bytes; for bytes,
+    `suffix` (e.g. ".pdf") selects the format.
     Supported:
         - .txt
         - .pdf (digital)
@@ -16,51 +21,73 @@ def load_text_from_file(file_path: str) -> str:
         - .csv
         - .json
     """
-    path = Path(file_path)
-    ext = path.suffix.lower()
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        if suffix is None:
+            raise ValueError("A file suffix is required when loading from bytes.")
+        data = bytes(src)
+    else:
+        path = Path(src)
+        suffix = suffix or path.suffix
+        data = path.read_bytes()
+
+    ext = suffix.lower()
 
     if ext == ".txt":
-        return path.read_text(encoding="utf-8", errors="ignore")
+        return data.decode("utf-8", errors="ignore")
 
     elif ext == ".pdf":
-        return _extract_pdf(path)
+        return _extract_pdf(data)
 
     elif ext == ".docx":
-        return _extract_docx(path)
+        return _extract_docx(data)
 
     elif ext == ".csv":
-        return _extract_csv(path)
+        return _extract_csv(data)
 
     elif ext == ".json":
-        return _extract_json(path)
+        return _extract_json(data)
 
     else:
         raise ValueError(f"Unsupported file format: {ext}")
 
 
-def _extract_pdf(path: Path) -> str:
-    reader = PdfReader(str(path))
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() or ""
-    return text
+def _extract_pdf(data: bytes) -> str:
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:  # fall back to the pure-Python extractor
+        pdfium = None
+
+    if pdfium is not None:
+        pdf = pdfium.PdfDocument(data)
+        try:
+            parts = [page.get_textpage().get_text_range() for page in pdf]
+        finally:
+            pdf.close()
+        return "".join(parts)
+
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(io.BytesIO(data))
+    parts = [page.extract_text() or "" for page in reader.pages]
+    return "".join(parts)
+
 
+def _extract_docx(data: bytes) -> str:
+    from docx import Document
 
-def _extract_docx(path: Path) -> str:
-    doc = Document(str(path))
+    doc = Document(io.BytesIO(data))
     text = "\n".join([p.text for p in doc.paragraphs])
     return text
 
 
-def _extract_csv(path: Path) -> str:
-    df = pd.read_csv(path)
-    return df.to_string(index=False)
+def _extract_csv(data: bytes) -> str:
+    f = io.StringIO(data.decode("utf-8-sig", errors="ignore"), newline="")
+    reader = csv.reader(f)
+    return "\n".join("\t".join(row) for row in reader)
 
 
-def _extract_json(path: Path) -> str:
+def _extract_json(data: bytes) -> str:
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return json.dumps(data, indent=2)
+        return orjson.dumps(orjson.loads(data), option=orjson.OPT_INDENT_2).decode("utf-8")
     except:
-        return path.read_text(encoding="utf-8", errors="ignore")
+        return data.decode("utf-8", errors="ignore")
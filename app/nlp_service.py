@@ -1,12 +1,35 @@
 # app/nlp_service.py
 
-import json
+import hashlib
+import queue
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache, wraps
+
+import orjson
 import requests
-from azure.ai.textanalytics import TextAnalyticsClient
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from azure.ai.textanalytics import (
+    AnalyzeSentimentAction,
+    ExtractKeyPhrasesAction,
+    RecognizeEntitiesAction,
+    RecognizePiiEntitiesAction,
+    TextAnalyticsClient,
+)
 from azure.core.credentials import AzureKeyCredential
+from .classification_rules import rule_classify
 from .config import get_settings
 from openai import AzureOpenAI
 
+try:
+    import xxhash
+except ImportError:  # fall back to the stdlib hash for cache keys
+    xxhash = None
+
 settings = get_settings()
 
 client = TextAnalyticsClient(
@@ -20,22 +43,243 @@ openai_client = AzureOpenAI(
     azure_endpoint=settings.azure_openai_endpoint
 )
 
+# Classification needs the newer API version; built once so its connection pool is reused
+classify_openai_client = AzureOpenAI(
+    api_key=settings.azure_openai_key,
+    api_version="2024-08-01-preview",
+    azure_endpoint=settings.azure_openai_endpoint
+)
+
+CATEGORY_LIST = (
+    "Personal Information",
+    "Professional / Work",
+    "Education",
+    "Technical / Engineering",
+    "Healthcare / Medical",
+    "Finance / Banking",
+    "Travel / Location",
+    "Legal / Compliance",
+    "Sentiment / Opinion",
+    "Miscellaneous / Other",
+)
+
+SENSITIVE_PII_CATEGORIES = frozenset({
+    "PhoneNumber",
+    "Email",
+    "CreditCardNumber",
+    "BankAccountNumber",
+    "InternationalBankingNumber",
+    "USSocialSecurityNumber",
+    "USITIN",
+    "AadhaarNumber",
+    "PassportNumber",
+    "UKNHSNumber",
+    "CADriversLicenseNumber",
+    "IPAddress",
+})
+
+
+# Shared pool for fanning out independent Azure calls; the sync SDK clients release the GIL during HTTP
+_executor = ThreadPoolExecutor(max_workers=8)
+# Separate pool for micro-batch flushes so they never queue behind GPT calls
+_batch_executor = ThreadPoolExecutor(max_workers=8)
+
+
+class _MicroBatcher:
+    """
+    Coalesce single-document calls from concurrent requests into one batched
+    SDK call. The first caller waits up to max_wait for others to join.
+    """
+
+    def __init__(self, call, max_batch: int, max_wait: float = 0.02):
+        self._call = call
+        self._max_batch = max_batch
+        self._max_wait = max_wait
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, doc: str) -> Future:
+        future = Future()
+        self._queue.put((doc, future))
+        return future
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self._max_wait
+            while len(items) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Flush on its own pool so a slow batch doesn't hold up the next one
+            _batch_executor.submit(self._flush, items)
+
+    def _flush(self, items: list):
+        try:
+            results = self._call([doc for doc, _ in items])
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+
+        # Results come back in document order
+        for (_, future), res in zip(items, results):
+            future.set_result(res)
+
+        # A short result list must not leave callers waiting forever
+        for _, future in items:
+            if not future.done():
+                future.set_exception(RuntimeError("Language batch returned fewer results than documents."))
+
+
+# Azure Language accepts up to 1000 documents per detect_language request
+_DETECT_LANGUAGE_BATCH_SIZE = 1000
+
+# Batch sizes follow the Language service's per-request document limits
+_detect_language_batcher = _MicroBatcher(client.detect_language, max_batch=_DETECT_LANGUAGE_BATCH_SIZE)
+_sentiment_batcher = _MicroBatcher(client.analyze_sentiment, max_batch=10)
+_key_phrases_batcher = _MicroBatcher(client.extract_key_phrases, max_batch=10)
+_entities_batcher = _MicroBatcher(client.recognize_entities, max_batch=5)
+_pii_batcher = _MicroBatcher(client.recognize_pii_entities, max_batch=5)
+
+
+@lru_cache(maxsize=1)
+def _session() -> requests.Session:
+    """
+    Shared HTTP session so Azure REST calls reuse pooled keep-alive connections.
+    """
+    retry = Retry(
+        total=3,
+        backoff_factor=0.2,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset({"GET", "POST"}),  # Translator calls are POSTs with no side effects
+    )
+    s = requests.Session()
+    s.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=retry))
+    return s
+
+
+# Longer texts skip the result caches below to keep their memory bounded
+_CACHE_MAX_TEXT_LEN = 8000
+
+
+def _text_digest(text: str) -> bytes:
+    data = text.encode("utf-8")
+    if xxhash is not None:
+        return xxhash.xxh3_128_digest(data)
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class _TextKey:
+    """
+    lru_cache key for a text: hashes and compares on a 16-byte digest
+    (xxh3 when available, else blake2b) and carries the text through to
+    the cached function, so lookups never re-hash or compare the full text.
+    """
+    __slots__ = ("digest", "text")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.digest = _text_digest(text)
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    def __eq__(self, other):
+        return isinstance(other, _TextKey) and other.digest == self.digest
 
-def summarize_using_gpt(text: str) -> str:
-    prompt = f"Summarize the following text in 3-4 sentences:\n\n{text}"
 
+class _DoNotCache(Exception):
+    """
+    Raised by a memoized function to return a degraded result without caching it.
+    """
+
+    def __init__(self, value):
+        super().__init__()
+        self.value = value
+
+
+def _memoize_by_text(fn):
+    """
+    Cache a text -> result function so repeated texts skip the Azure round trip.
+    Extra positional arguments after the text become part of the key.
+    Callers must treat the returned value as read-only since it is shared.
+    """
+    @lru_cache(maxsize=4096)
+    def cached(key: _TextKey, *args):
+        return fn(key.text, *args)
+
+    @wraps(fn)
+    def wrapper(text: str, *args):
+        try:
+            if len(text) > _CACHE_MAX_TEXT_LEN:
+                return fn(text, *args)
+            return cached(_TextKey(text), *args)
+        except _DoNotCache as e:
+            # lru_cache doesn't store raised calls, so the next call retries
+            return e.value
+
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
+
+# Upper bound on user text sent to GPT so prompt size (and latency/cost) is bounded
+_MAX_PROMPT_TEXT_CHARS = 6000
+
+
+def _truncate_for_prompt(text: str) -> str:
+    return text[:_MAX_PROMPT_TEXT_CHARS]
+
+
+def _summary_messages(text: str) -> list[dict]:
+    prompt = f"Summarize the following text in 3-4 sentences:\n\n{_truncate_for_prompt(text)}"
+
+    return [
+        {"role": "system", "content": "You are a helpful assistant that summarizes text clearly."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+@_memoize_by_text
+def summarize_using_gpt(text: str) -> str:
     response = openai_client.chat.completions.create(
         model=settings.azure_openai_model,
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant that summarizes text clearly."},
-            {"role": "user", "content": prompt}
-        ]
+        messages=_summary_messages(text)
     )
 
     return response.choices[0].message.content.strip()
 
-import re
 
+def stream_summary_gpt(text: str):
+    """
+    Yield the GPT summary as it is generated, so the UI can show the first
+    tokens without waiting for the full completion.
+    """
+    response = openai_client.chat.completions.create(
+        model=settings.azure_openai_model,
+        messages=_summary_messages(text),
+        stream=True
+    )
+
+    for chunk in response:
+        # Azure sends an initial chunk with no choices (content filter results)
+        if chunk.choices:
+            yield chunk.choices[0].delta.content or ""
+
+
+# Splits on periods and newlines into rough "sentences"
+_SEG_RE = re.compile(r"[.\n]+")
+
+# Shorter segments give meaningless confidences but are still billed as documents
+_MIN_SEGMENT_LEN = 20
+
+
+@_memoize_by_text
 def detect_languages_multiline(text: str):
     """
     Detect languages across multiple segments of the text.
@@ -43,63 +287,97 @@ def detect_languages_multiline(text: str):
     """
 
     # Split on periods and newlines into rough "sentences"
-    segments = [
-        s.strip()
-        for s in re.split(r"[.\n]+", text)
-        if len(s.strip()) > 0
-    ]
+    segments = [s for s in (s.strip() for s in _SEG_RE.split(text)) if s]
 
     if not segments:
         return []
 
-    lang_stats = {}  # iso -> {language, iso6391, confidence_sum, count}
+    # Send each distinct segment once, weighted by how often it occurs.
+    # Drop tiny segments unless that would leave nothing to detect.
+    weights = Counter(s for s in segments if len(s) >= _MIN_SEGMENT_LEN) or Counter(segments)
+    unique_segments = list(weights)
+
+    # Flat per-language accumulators keyed by iso code
+    confidence_sums = Counter()
+    counts = Counter()
+    names = {}
+    batch_failed = False
 
-    for seg in segments:
+    # One request per batch of segments instead of one per segment
+    for start in range(0, len(unique_segments), _DETECT_LANGUAGE_BATCH_SIZE):
+        batch = unique_segments[start:start + _DETECT_LANGUAGE_BATCH_SIZE]
         try:
-            res = client.detect_language([seg])[0]
-            pl = res.primary_language
-            code = pl.iso6391_name
-            name = pl.name
-            conf = pl.confidence_score
+            results = client.detect_language(batch)
+        except Exception:
+            # If a whole batch fails, skip it but don't cache the partial breakdown
+            batch_failed = True
+            continue
 
-            if code not in lang_stats:
-                lang_stats[code] = {
-                    "language": name,
-                    "iso6391": code,
-                    "confidence_sum": 0.0,
-                    "count": 0,
-                }
+        for seg, res in zip(batch, results):
+            # Per-segment failures come back as error results, not exceptions
+            if res.is_error:
+                continue
 
-            lang_stats[code]["confidence_sum"] += conf
-            lang_stats[code]["count"] += 1
+            weight = weights[seg]
 
-        except Exception:
-            # If any segment fails, just skip it
-            continue
+            pl = res.primary_language
+            code = pl.iso6391_name
+
+            names.setdefault(code, pl.name)
+            confidence_sums[code] += pl.confidence_score * weight
+            counts[code] += weight
 
     # Build final breakdown with average confidence and filter by threshold
     breakdown = []
     threshold = 0.20
 
-    for code, info in lang_stats.items():
-        avg_conf = info["confidence_sum"] / max(info["count"], 1)
+    for code, count in counts.items():
+        avg_conf = confidence_sums[code] / count
         if avg_conf >= threshold:
             breakdown.append(
                 {
-                    "language": info["language"],
-                    "iso6391": info["iso6391"],
+                    "language": names[code],
+                    "iso6391": code,
                     "confidence": avg_conf,
                 }
             )
 
     # Sort descending by confidence
     breakdown.sort(key=lambda x: x["confidence"], reverse=True)
+
+    if batch_failed:
+        raise _DoNotCache(breakdown)
     return breakdown
 
 
-def translate_text(text: str, target_lang: str = "en") -> str:
+# Azure Translator request limits per POST
+_TRANSLATE_BATCH_SIZE = 100
+_TRANSLATE_BATCH_CHARS = 50000
+
+# Leads every per-text error string from translate_texts
+TRANSLATION_ERROR_PREFIX = "Translation error: "
+
+
+def _translate_batches(texts: list[str]):
     """
-    Translate text to the target language using Azure Translator.
+    Group texts into consecutive batches within the Translator request limits.
+    """
+    batch, batch_chars = [], 0
+    for text in texts:
+        if batch and (len(batch) == _TRANSLATE_BATCH_SIZE or batch_chars + len(text) > _TRANSLATE_BATCH_CHARS):
+            yield batch
+            batch, batch_chars = [], 0
+        batch.append(text)
+        batch_chars += len(text)
+    if batch:
+        yield batch
+
+
+def translate_texts(texts: list[str], target_lang: str = "en") -> list[str]:
+    """
+    Translate several texts to the target language using Azure Translator,
+    sending as many as the service allows in each request.
+    Results are in input order; a failed batch yields an error string per text.
     """
     endpoint = settings.azure_translate_endpoint
     key = settings.azure_translate_key
@@ -114,68 +392,75 @@ def translate_text(text: str, target_lang: str = "en") -> str:
         "Content-Type": "application/json"
     }
 
-    payload = [{"text": text}]
+    translated = []
+    for batch in _translate_batches(texts):
+        payload = [{"text": t} for t in batch]
 
-    try:
-        resp = requests.post(url, json=payload, headers=headers)
-        resp.raise_for_status()
-        data = resp.json()
-        return data[0]["translations"][0]["text"]
-    except Exception as e:
-        return f"Translation error: {e}"
-    
-def classify_text_gpt(text: str) -> dict:
-    """
-    Single-label GPT classification using Azure OpenAI.
-    Robust JSON parsing with fallback.
-    """
+        try:
+            resp = _session().post(url, data=orjson.dumps(payload), headers=headers, timeout=(3, 10))
+            resp.raise_for_status()
+            data = orjson.loads(resp.content)
+            batch_translated = [item["translations"][0]["text"] for item in data]
+        except Exception as e:
+            batch_translated = [f"{TRANSLATION_ERROR_PREFIX}{e}"] * len(batch)
 
-    CATEGORY_LIST = [
-        "Personal Information",
-        "Professional / Work",
-        "Education",
-        "Technical / Engineering",
-        "Healthcare / Medical",
-        "Finance / Banking",
-        "Travel / Location",
-        "Legal / Compliance",
-        "Sentiment / Opinion",
-        "Miscellaneous / Other"
-    ]
+        translated.extend(batch_translated)
 
-    settings = get_settings()
+    return translated
 
-    client = AzureOpenAI(
-        api_key=settings.azure_openai_key,
-        api_version="2024-08-01-preview",
-        azure_endpoint=settings.azure_openai_endpoint
-    )
 
-    prompt = f"""
-    You must classify the text into EXACTLY ONE of these categories:
+@_memoize_by_text
+def translate_text(text: str, target_lang: str = "en") -> str:
+    """
+    Translate text to the target language using Azure Translator.
+    """
+    translated = translate_texts([text], target_lang)[0]
+    if translated.startswith(TRANSLATION_ERROR_PREFIX):
+        # Return the error but let the next call retry
+        raise _DoNotCache(translated)
+    return translated
+
+
+# Classification prompt, built once; numbered plain-text categories cost fewer tokens than a list repr
+_CATEGORY_STR = "\n".join(f"{i}. {c}" for i, c in enumerate(CATEGORY_LIST, start=1))
+
+_CLASSIFY_PROMPT_TEMPLATE = (
+    "Classify the text into EXACTLY ONE of these categories:\n"
+    "{categories}\n\n"
+    "Return JSON with this structure:\n"
+    '{{"label": "category name from the list", "confidence": 0.0 to 1.0, "explanation": "short explanation"}}\n'
+    "Respond with JSON only.\n\n"
+    "Text to classify:\n"
+    "{text}"
+)
 
-    {CATEGORY_LIST}
+# Leading/trailing markdown code fences around a GPT JSON reply
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
 
-    Return ONLY valid JSON with this structure:
 
-    {{
-      "label": "category from list",
-      "confidence": 0.0 to 1.0,
-      "explanation": "short explanation"
-    }}
+@_memoize_by_text
+def classify_text_gpt(text: str) -> dict:
+    """
+    Single-label GPT classification using Azure OpenAI.
+    Robust JSON parsing with fallback.
+    Clear-cut inputs are classified by local rules without calling GPT.
+    """
 
-    Do NOT add anything else.
-    Do NOT add comments.
-    Do NOT add markdown.
-    Do NOT wrap in ```json```.
+    ruled = rule_classify(text)
+    if ruled is not None:
+        return ruled
 
-    Text to classify:
-    {text}
-    """
+    prompt = _CLASSIFY_PROMPT_TEMPLATE.format(
+        categories=_CATEGORY_STR,
+        text=_truncate_for_prompt(text)
+    )
 
-    response = client.chat.completions.create(
+    # JSON mode guarantees a bare JSON object (no fences); the cap stops runaway output
+    response = classify_openai_client.chat.completions.create(
         model=settings.azure_openai_model,
         temperature=0,
+        max_tokens=128,
+        response_format={"type": "json_object"},
         messages=[
             {"role": "system", "content": "Return ONLY valid JSON."},
             {"role": "user", "content": prompt}
@@ -184,86 +469,125 @@ def classify_text_gpt(text: str) -> dict:
 
     raw = response.choices[0].message.content.strip()
 
-    # ---------------------
-    # CLEAN OUTPUT
-    # ---------------------
-    raw = raw.replace("```json", "")
-    raw = raw.replace("```", "")
-    raw = raw.strip()
-
     # ---------------------
     # PARSE JSON SAFELY
     # ---------------------
     try:
-        data = json.loads(raw)
+        try:
+            data = orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # JSON mode shouldn't emit fences, but older deployments still might
+            data = orjson.loads(_FENCE_RE.sub("", raw).strip())
         return {
             "label": data.get("label", "Miscellaneous / Other"),
             "confidence": float(data.get("confidence", 0.75)),
             "explanation": data.get("explanation", "")
         }
     except Exception:
-        # fallback if GPT still fails
-        return {
+        # fallback if GPT still fails; not cached so the next call retries
+        raise _DoNotCache({
             "label": "Miscellaneous / Other",
             "confidence": 0.70,
             "explanation": "Failed to parse GPT classification output."
-        }
+        })
+
 
 
 
+# A short text detected this confidently is treated as monolingual
+_SHORT_TEXT_LEN = 500
+_MONOLINGUAL_CONFIDENCE = 0.95
 
-def analyze_text_all(text: str) -> dict:
+
+def _analyze_actions_fused(docs: list[str]) -> tuple:
+    """
+    Run sentiment, key phrases, entities and PII as a single multi-action job.
+    Returns the four results for the first document, in that order.
+    """
+    poller = client.begin_analyze_actions(
+        docs,
+        actions=[
+            AnalyzeSentimentAction(),
+            ExtractKeyPhrasesAction(),
+            RecognizeEntitiesAction(),
+            RecognizePiiEntitiesAction(),
+        ],
+        polling_interval=1,
+    )
+
+    # One list of action results per document, in the order the actions were given
+    sentiment, key_phrases, entities, pii = next(iter(poller.result()))
+    return sentiment, key_phrases, entities, pii
+
+
+def analyze_text_all(text: str, include_summary: bool = True) -> dict:
+    """
+    Run every analysis on the text. With include_summary=False the summary is
+    left empty so the caller can stream it with stream_summary_gpt instead.
+    """
     if not text or not text.strip():
         raise ValueError("Text is empty.")
 
     docs = [text]
 
-    # 1. Language detection
-    lang = client.detect_language(docs)[0]
+    # Fire all independent calls at once so latency is the slowest call, not the sum
+    lang_future = _detect_language_batcher.submit(text)
+
+    if settings.azure_language_fused_actions:
+        # One submit + poll instead of four requests; fewer calls against the rate limit
+        actions_future = _executor.submit(_analyze_actions_fused, docs)
+    else:
+        action_futures = [
+            batcher.submit(text)
+            for batcher in (
+                _sentiment_batcher,
+                _key_phrases_batcher,
+                _entities_batcher,
+                _pii_batcher,
+            )
+        ]
 
-    # 2. Sentiment
-    sentiment = client.analyze_sentiment(docs)[0]
+    summary_future = _executor.submit(summarize_using_gpt, text) if include_summary else None
+    classification_future = _executor.submit(classify_text_gpt, text)
 
-    # 3. Key phrases
-    key_phrases = client.extract_key_phrases(docs)[0]
+    # Short texts wait for the whole-text detection, which usually makes the breakdown unnecessary
+    short_text = len(text) < _SHORT_TEXT_LEN
+    multi_lang_future = None if short_text else _executor.submit(detect_languages_multiline, text)
 
-    # 4. Named Entities
-    entities = client.recognize_entities(docs)[0]
+    # 1. Language detection
+    lang = lang_future.result()
+
+    primary = lang.primary_language
+    monolingual = short_text and primary.confidence_score >= _MONOLINGUAL_CONFIDENCE
+    if short_text and not monolingual:
+        multi_lang_future = _executor.submit(detect_languages_multiline, text)
 
-    # 5. PII Entities
-    pii = client.recognize_pii_entities(docs)[0]
+    # 2-5. Sentiment, Key phrases, Named Entities, PII Entities
+    if settings.azure_language_fused_actions:
+        sentiment, key_phrases, entities, pii = actions_future.result()
+    else:
+        sentiment, key_phrases, entities, pii = (f.result() for f in action_futures)
 
     # 6. Summarization using GPT
-    gpt_summary = summarize_using_gpt(text)
-    summary_sentences = [gpt_summary]
+    summary_sentences = [summary_future.result()] if include_summary else []
 
     # ------------------------
-    # CLEAN MULTI-LANGUAGE
+    # MULTI-LANGUAGE (already filtered by confidence threshold)
     # ------------------------
-    multi_lang = detect_languages_multiline(text)
-    multi_lang = [
-        lang for lang in multi_lang
-        if lang["confidence"] >= 0.20
-    ]
+    if monolingual:
+        multi_lang = [
+            {
+                "language": primary.name,
+                "iso6391": primary.iso6391_name,
+                "confidence": primary.confidence_score,
+            }
+        ]
+    else:
+        multi_lang = multi_lang_future.result()
 
     # ------------------------
     # FILTER SENSITIVE PII
     # ------------------------
-    SENSITIVE_PII_CATEGORIES = [
-        "PhoneNumber",
-        "Email",
-        "CreditCardNumber",
-        "BankAccountNumber",
-        "InternationalBankingNumber",
-        "USSocialSecurityNumber",
-        "USITIN",
-        "AadhaarNumber",
-        "PassportNumber",
-        "UKNHSNumber",
-        "CADriversLicenseNumber",
-        "IPAddress"
-    ]
-
     pii_filtered = [
         {
             "text": e.text,
@@ -284,7 +608,7 @@ def analyze_text_all(text: str) -> dict:
             "confidence": lang.primary_language.confidence_score,
         },
 
-        "multi_language": detect_languages_multiline(text),
+        "multi_language": multi_lang,
 
         "sentiment": {
             "overall": sentiment.sentiment,
@@ -295,7 +619,7 @@ def analyze_text_all(text: str) -> dict:
             },
         },
 
-        "classification": classify_text_gpt(text),
+        "classification": classification_future.result(),
 
         "key_phrases": key_phrases.key_phrases,
 
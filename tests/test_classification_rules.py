@@ -0,0 +1,45 @@
+import pytest
+
+from app.classification_rules import rule_classify
+
+
+@pytest.mark.parametrize("text", [
+    "Invoice due 2024-01-15",
+    "Meeting on 2024-01-15",
+    "Ref: 2023-11-04 12:30",
+    "Price (USD) 1200-1500",
+    "order 1234567890123",
+    "Tracking 1234 5678 9012 3452",
+    "Order #4111111111111111 shipped",
+    "Serial SN0012345678 replaced",
+    "Part number AB12CDEF3456 in stock",
+    "Version ID XY99 ABCD EFGH",
+    "DHL tracking JD014600001234567890 arrives Monday",
+    "The treatment therapy surgery plan for the garden lawn.",
+])
+def test_ids_dates_and_ranges_fall_through_to_gpt(text):
+    assert rule_classify(text) is None
+
+
+@pytest.mark.parametrize("text, label", [
+    ("Pay to DE89 3704 0044 0532 0130 00 today", "Finance / Banking"),
+    ("IBAN GB82WEST12345698765432", "Finance / Banking"),
+    ("card 4111 1111 1111 1111", "Finance / Banking"),
+    ("Amex 3782 822463 10005", "Finance / Banking"),
+    ("Call 98765-12345 or a@b.com", "Personal Information"),
+    ("+919876512345", "Personal Information"),
+    ("Phone: (555) 123-4567", "Personal Information"),
+    ("Reach me at rahul@example.com", "Personal Information"),
+    ("The patient reported symptoms; diagnosis pending, medication prescribed.", "Healthcare / Medical"),
+])
+def test_clear_cut_texts_are_classified_locally(text, label):
+    assert rule_classify(text)["label"] == label
+
+
+def test_long_mixed_text_falls_through_to_gpt():
+    text = (
+        "Hello, my name is Rahul Sharma. I work as a data analyst at a healthcare startup. "
+        "My contact number is 98765-12345 and my email is rahul.sharma@example.com. "
+        "The company is interested in patient data trends."
+    )
+    assert rule_classify(text) is None